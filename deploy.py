@@ -8,28 +8,25 @@ import os
 import sys
 import subprocess
 import json
+import time
+import signal
+import hashlib
+import getpass
+import string
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def print_banner():
-    """Print deployment banner"""
-    print("=" * 60)
-    print("🚀 MICROCAP QUANT - DEPLOYMENT SCRIPT")
-    print("=" * 60)
-    print("AI-Powered Microcap Trading Bot")
-    print("Version: 0.2.0")
-    print("=" * 60)
+# Dependency install cache: skip pip when requirements are unchanged
+DEPLOY_CACHE_FILE = Path("data") / ".deploy_cache.json"
+DEPLOY_CACHE_TTL_HOURS = 24
 
-def check_python_version():
-    """Check if Python version is compatible"""
-    if sys.version_info < (3, 9):
-        print("❌ Error: Python 3.9+ required")
-        print(f"Current version: {sys.version}")
-        sys.exit(1)
-    print(f"✅ Python {sys.version_info.major}.{sys.version_info.minor} detected")
+# Output of the background setup test, kept off the interactive terminal
+SETUP_TEST_LOG = Path("logs") / "setup_test.log"
 
-def create_env_file():
-    """Create .env file with user input"""
-    env_template = """# =============================================================================
+# .env template, parsed once at import
+_ENV_TEMPLATE = string.Template("""# =============================================================================
 # MICROCAP QUANT - ENVIRONMENT VARIABLES
 # =============================================================================
 
@@ -39,15 +36,15 @@ def create_env_file():
 
 # OpenAI API Key (Required for GPT-4o and o3 deep research)
 # Get from: https://platform.openai.com/api-keys
-OPENAI_API_KEY={openai_key}
+OPENAI_API_KEY=${openai_key}
 
 # Anthropic API Key (Optional - backup AI provider)
 # Get from: https://console.anthropic.com/
-ANTHROPIC_API_KEY={anthropic_key}
+ANTHROPIC_API_KEY=${anthropic_key}
 
 # Groq API Key (Optional - fast inference backup)
 # Get from: https://console.groq.com/
-GROQ_API_KEY={groq_key}
+GROQ_API_KEY=${groq_key}
 
 # =============================================================================
 # TRADING API KEYS (Required)
@@ -55,8 +52,8 @@ GROQ_API_KEY={groq_key}
 
 # Alpaca Trading API Keys
 # Get from: https://alpaca.markets/ (Paper Trading for testing)
-ALPACA_API_KEY={alpaca_key}
-ALPACA_SECRET_KEY={alpaca_secret}
+ALPACA_API_KEY=${alpaca_key}
+ALPACA_SECRET_KEY=${alpaca_secret}
 
 # =============================================================================
 # AI MODEL CONFIGURATION
@@ -79,7 +76,7 @@ AI_RESEARCH_MODEL=o3-deep-research-2025-06-26
 PAPER_TRADING=true
 
 # Starting capital in USD
-STARTING_CASH={starting_cash}
+STARTING_CASH=${starting_cash}
 
 # Maximum position size as percentage (0.15 = 15%)
 MAX_POSITION_PCT=0.15
@@ -95,22 +92,22 @@ MAX_DAILY_LOSS=0.05
 # =============================================================================
 
 # Slack webhook for alerts
-SLACK_WEBHOOK={slack_webhook}
+SLACK_WEBHOOK=${slack_webhook}
 
 # Email notifications (requires SMTP setup)
 EMAIL_ALERTS=false
-EMAIL_FROM={email_from}
-EMAIL_TO={email_to}
-EMAIL_PASSWORD={email_password}
+EMAIL_FROM=${email_from}
+EMAIL_TO=${email_to}
+EMAIL_PASSWORD=${email_password}
 
 # =============================================================================
 # ADVANCED SETTINGS
 # =============================================================================
 
-# Market cap maximum for microcap universe ($300M default)
+# Market cap maximum for microcap universe ($$300M default)
 MARKET_CAP_MAX=300000000
 
-# Minimum daily volume filter ($50K default)
+# Minimum daily volume filter ($$50K default)
 MIN_VOLUME=50000
 
 # Timezone for trading schedules
@@ -118,39 +115,179 @@ TIMEZONE=US/Eastern
 
 # Data directory for portfolio and trade logs
 DATA_DIR=data
-"""
+""")
+
+# systemd unit template for local deployments
+_SERVICE_TEMPLATE = string.Template("""[Unit]
+Description=Microcap Quant Trading Bot
+After=network.target
+
+[Service]
+Type=simple
+User=${user}
+WorkingDirectory=${cwd}
+Environment=PATH=${cwd}/venv/bin
+ExecStart=${cwd}/venv/bin/python -m auto_trader.automated_trader
+Restart=always
+RestartSec=10
+
+[Install]
+WantedBy=multi-user.target
+""")
+
+# Serialises status output from setup steps running on worker threads
+_print_lock = threading.Lock()
+
+def _say(*lines):
+    """Print one or more lines atomically so concurrent steps don't interleave"""
+    with _print_lock:
+        for line in lines:
+            print(line)
+
+def _signal_group(proc, sig):
+    """Send a signal to a streamed child's process group (POSIX only)"""
+    try:
+        os.killpg(proc.pid, sig)
+    except ProcessLookupError:
+        pass
+
+def _kill(proc, grace=5):
+    """Terminate a streamed child and, on POSIX, its whole process group.
+    
+    Escalates to SIGKILL if the child is still alive after `grace` seconds.
+    Returns True if the child was still running when called.
+    """
+    if proc.poll() is not None:
+        return False
+    if os.name == "posix":
+        _signal_group(proc, signal.SIGTERM)
+    else:
+        proc.terminate()
+    try:
+        proc.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        if os.name == "posix":
+            _signal_group(proc, signal.SIGKILL)
+        else:
+            proc.kill()
+    return True
+
+def _stream(cmd, timeout=None, check=False, output=None, stop=None):
+    """Run a command, echoing its combined output line by line.
+    
+    Output is never buffered in memory; it goes to `output` (default stdout).
+    Raises subprocess.TimeoutExpired if the command is still running after
+    `timeout` seconds (it is killed first), and CalledProcessError on a
+    non-zero exit when `check` is set. Setting the optional `stop` event kills
+    the child early; the killed child's exit code is then returned (or
+    raised via `check`) like any other. Returns the exit code.
+    """
+    output = output or sys.stdout
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, bufsize=1,
+                            start_new_session=(os.name == "posix"))
+    # Reading stdout blocks, so enforce the timeout and stop event from a
+    # daemon watchdog that can never keep the interpreter alive
+    deadline = time.monotonic() + timeout if timeout else None
+    timed_out = threading.Event()
+    
+    def _watch():
+        while proc.poll() is None:
+            if stop is not None and stop.is_set():
+                _kill(proc)
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                # Flag before killing: once the child dies the main thread
+                # sees EOF and checks the flag, possibly before _kill returns
+                if proc.poll() is None:
+                    timed_out.set()
+                    _kill(proc)
+                return
+            time.sleep(0.1)
     
+    if deadline is not None or stop is not None:
+        threading.Thread(target=_watch, daemon=True).start()
+    try:
+        for line in proc.stdout:
+            output.write(line)
+        returncode = proc.wait()
+    except BaseException:
+        # Ctrl-C etc.: the child runs in its own session, so stop it explicitly
+        _kill(proc)
+        proc.wait()
+        raise
+    finally:
+        proc.stdout.close()
+    
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+    return returncode
+
+def print_banner():
+    """Print deployment banner"""
+    print("=" * 60)
+    print("🚀 MICROCAP QUANT - DEPLOYMENT SCRIPT")
+    print("=" * 60)
+    print("AI-Powered Microcap Trading Bot")
+    print("Version: 0.2.0")
+    print("=" * 60)
+
+def check_python_version():
+    """Check if Python version is compatible"""
+    if sys.version_info < (3, 9):
+        print("❌ Error: Python 3.9+ required")
+        print(f"Current version: {sys.version}")
+        sys.exit(1)
+    print(f"✅ Python {sys.version_info.major}.{sys.version_info.minor} detected")
+
+def _ask(value, prompt, secret=False, default=""):
+    """Return a CLI/env value, prompting interactively only when it is missing"""
+    value = (value or "").strip()
+    if value:
+        return value
+    if not sys.stdin.isatty():
+        return default
+    reader = getpass.getpass if secret else input
+    return reader(prompt).strip() or default
+
+def _prompt_env(args):
+    """Collect API keys and settings from CLI/env, prompting only for gaps"""
     print("\n🔑 API KEY SETUP")
     print("=" * 40)
     
-    # Get API keys from user
-    openai_key = input("Enter your OpenAI API key (sk-...): ").strip()
+    # Get API keys from CLI/environment, falling back to the user
+    openai_key = _ask(args.openai_key, "Enter your OpenAI API key (sk-...): ", secret=True)
     if not openai_key.startswith("sk-"):
         print("⚠️  Warning: OpenAI key should start with 'sk-'")
     
-    anthropic_key = input("Enter your Anthropic API key (optional, sk-ant-...): ").strip()
-    groq_key = input("Enter your Groq API key (optional, gsk-...): ").strip()
+    anthropic_key = _ask(args.anthropic_key,
+                         "Enter your Anthropic API key (optional, sk-ant-...): ", secret=True)
+    groq_key = _ask(args.groq_key, "Enter your Groq API key (optional, gsk-...): ", secret=True)
     
-    alpaca_key = input("Enter your Alpaca API key: ").strip()
-    alpaca_secret = input("Enter your Alpaca Secret key: ").strip()
+    alpaca_key = _ask(args.alpaca_key, "Enter your Alpaca API key: ", secret=True)
+    alpaca_secret = _ask(args.alpaca_secret, "Enter your Alpaca Secret key: ", secret=True)
+    if not alpaca_key or not alpaca_secret:
+        print("⚠️  Warning: Alpaca API key and secret are required for trading")
     
     # Trading configuration
     print("\n💰 TRADING CONFIGURATION")
     print("=" * 40)
     
-    starting_cash = input("Starting capital (default: 1000): ").strip() or "1000"
+    starting_cash = _ask(args.starting_cash, "Starting capital (default: 1000): ", default="1000")
     
     # Notifications
     print("\n📧 NOTIFICATIONS (Optional)")
     print("=" * 40)
     
-    slack_webhook = input("Slack webhook URL (optional): ").strip() or ""
-    email_from = input("Email for notifications (optional): ").strip() or ""
-    email_to = input("Email to receive reports (optional): ").strip() or ""
-    email_password = input("Email app password (optional): ").strip() or ""
+    slack_webhook = _ask(args.slack_webhook, "Slack webhook URL (optional): ")
+    email_from = _ask(args.email_from, "Email for notifications (optional): ")
+    email_to = _ask(args.email_to, "Email to receive reports (optional): ")
+    email_password = _ask(args.email_password, "Email app password (optional): ", secret=True)
     
-    # Create .env file
-    env_content = env_template.format(
+    # Render .env content
+    return _ENV_TEMPLATE.substitute(
         openai_key=openai_key,
         anthropic_key=anthropic_key,
         groq_key=groq_key,
@@ -162,52 +299,112 @@ DATA_DIR=data
         email_to=email_to,
         email_password=email_password
     )
-    
-    with open(".env", "w") as f:
-        f.write(env_content)
-    
-    print("✅ .env file created successfully")
 
-def install_dependencies():
+def _write_env(content):
+    """Write rendered .env content to disk"""
+    Path(".env").write_text(content, encoding="utf-8")
+    
+    _say("✅ .env file created successfully")
+
+def _requirements_fingerprint():
+    """Hash the install inputs: requirements, constraints and target interpreter"""
+    digest = hashlib.sha256(Path("requirements.txt").read_bytes())
+    constraints = Path("constraints.txt")
+    if constraints.exists():
+        digest.update(b"\0constraints\0" + constraints.read_bytes())
+    # A different venv or interpreter needs its own install
+    for part in (sys.executable, sys.prefix, ".".join(map(str, sys.version_info[:3]))):
+        digest.update(b"\0" + part.encode())
+    return digest.hexdigest()
+
+def _load_deploy_cache():
+    """Load the deploy cache, returning an empty dict if missing or corrupt"""
+    try:
+        return json.loads(DEPLOY_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def _save_deploy_cache(fingerprint):
+    """Record a successful install for the given fingerprint"""
+    DEPLOY_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    DEPLOY_CACHE_FILE.write_text(json.dumps({
+        "fingerprint": fingerprint,
+        "installed_at": time.time()
+    }))
+
+def install_dependencies(force=False, ttl_hours=DEPLOY_CACHE_TTL_HOURS):
     """Install Python dependencies"""
-    print("\n📦 INSTALLING DEPENDENCIES")
-    print("=" * 40)
+    _say("\n📦 INSTALLING DEPENDENCIES", "=" * 40)
     
     try:
-        subprocess.run([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"], 
-                      check=True, capture_output=True, text=True)
-        print("✅ Dependencies installed successfully")
+        fingerprint = _requirements_fingerprint()
+    except OSError as e:
+        _say(f"❌ Error installing dependencies: {e}")
+        sys.exit(1)
+    
+    if not force:
+        cache = _load_deploy_cache()
+        age = time.time() - cache.get("installed_at", 0)
+        if cache.get("fingerprint") == fingerprint and age < ttl_hours * 3600:
+            _say("✅ Dependencies unchanged — skipping install")
+            return
+    
+    # Single batched pip call: skip the self-update probe, never prompt, prefer wheels
+    cmd = [sys.executable, "-m", "pip", "install",
+           "--disable-pip-version-check", "--no-input", "--prefer-binary",
+           "-r", "requirements.txt"]
+    # Pin the resolver with a constraints file when one is present
+    if Path("constraints.txt").exists():
+        cmd += ["-c", "constraints.txt"]
+    
+    try:
+        # Stream pip output straight to the terminal so progress is visible
+        subprocess.run(cmd, check=True, stdout=None, stderr=None)
+        _save_deploy_cache(fingerprint)
+        _say("✅ Dependencies installed successfully")
     except subprocess.CalledProcessError as e:
-        print(f"❌ Error installing dependencies: {e}")
-        print(f"Error output: {e.stderr}")
+        _say(f"❌ Error installing dependencies: {e}", "See pip output above for details")
         sys.exit(1)
 
-def run_tests():
-    """Run basic tests to verify setup"""
-    print("\n🧪 RUNNING TESTS")
-    print("=" * 40)
+def run_tests(log_path=None, stop=None):
+    """Run basic tests to verify setup.
     
+    Streams test output to `log_path` when given (for background runs),
+    otherwise to stdout. Prints nothing itself; returns (passed, message).
+    """
     try:
         # Test AI connection
-        result = subprocess.run([sys.executable, "tests/test_ai_only.py"], 
-                              capture_output=True, text=True, timeout=60)
-        if result.returncode == 0:
-            print("✅ AI connection test passed")
+        cmd = [sys.executable, "tests/test_ai_only.py"]
+        if log_path:
+            with open(log_path, "w", encoding="utf-8") as log:
+                returncode = _stream(cmd, timeout=60, output=log, stop=stop)
         else:
-            print("⚠️  AI test failed - check your API keys")
-            print(f"Error: {result.stderr}")
+            returncode = _stream(cmd, timeout=60, stop=stop)
+        if returncode == 0:
+            return True, "✅ AI connection test passed"
+        return False, "⚠️  AI test failed - check your API keys"
+    except subprocess.TimeoutExpired:
+        return False, "⚠️  AI connection test timed out"
     except Exception as e:
-        print(f"⚠️  Test failed: {e}")
+        return False, f"⚠️  Test failed: {e}"
 
 def create_directories():
     """Create necessary directories"""
-    print("\n📁 CREATING DIRECTORIES")
-    print("=" * 40)
+    _say("\n📁 CREATING DIRECTORIES", "=" * 40)
     
     directories = ["data", "logs", "reports"]
-    for directory in directories:
-        Path(directory).mkdir(exist_ok=True)
-        print(f"✅ Created {directory}/")
+    
+    def _ensure(directory):
+        # A stat is cheaper than a failing mkdir on network filesystems
+        path = Path(directory)
+        if path.is_dir():
+            return f"✅ {directory}/ already exists"
+        path.mkdir(exist_ok=True)
+        return f"✅ Created {directory}/"
+    
+    # mkdirs run in parallel; status lines print in list order
+    with ThreadPoolExecutor(max_workers=len(directories)) as pool:
+        _say(*pool.map(_ensure, directories))
 
 def show_deployment_options():
     """Show deployment options"""
@@ -265,11 +462,11 @@ def deploy_docker():
         print("✅ Docker detected")
         
         # Build and run Docker container
-        subprocess.run(["docker", "build", "-t", "microcap-quant", "."], check=True)
+        _stream(["docker", "build", "-t", "microcap-quant", "."], check=True)
         print("✅ Docker image built")
         
         # Run container
-        subprocess.run([
+        _stream([
             "docker", "run", "-d", "--name", "microcap-quant-bot",
             "--env-file", ".env",
             "-v", f"{os.getcwd()}/data:/app/data",
@@ -277,7 +474,7 @@ def deploy_docker():
         ], check=True)
         print("✅ Docker container started")
         
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, FileNotFoundError):
         print("❌ Docker not available or failed")
         print("Install Docker from https://docker.com")
 
@@ -287,22 +484,7 @@ def deploy_local():
     print("=" * 40)
     
     # Create systemd service file
-    service_content = """[Unit]
-Description=Microcap Quant Trading Bot
-After=network.target
-
-[Service]
-Type=simple
-User={user}
-WorkingDirectory={cwd}
-Environment=PATH={cwd}/venv/bin
-ExecStart={cwd}/venv/bin/python -m auto_trader.automated_trader
-Restart=always
-RestartSec=10
-
-[Install]
-WantedBy=multi-user.target
-""".format(user=os.getenv("USER"), cwd=os.getcwd())
+    service_content = _SERVICE_TEMPLATE.substitute(user=os.getenv("USER"), cwd=os.getcwd())
     
     with open("microcap-quant.service", "w") as f:
         f.write(service_content)
@@ -313,27 +495,90 @@ WantedBy=multi-user.target
     print("sudo systemctl enable microcap-quant")
     print("sudo systemctl start microcap-quant")
 
-def main():
+def parse_args(argv=None):
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Deploy the Microcap Quant trading bot")
+    parser.add_argument("--force", action="store_true",
+                        help="Reinstall dependencies even if requirements.txt is unchanged")
+    parser.add_argument("--cache-ttl-hours", type=float, default=DEPLOY_CACHE_TTL_HOURS,
+                        help="Hours a cached install stays valid "
+                             f"(default: {DEPLOY_CACHE_TTL_HOURS})")
+    parser.add_argument("--skip-tests", action="store_true",
+                        help="Skip the AI connection smoke test (e.g. on CI)")
+    
+    # .env values; each falls back to the matching environment variable.
+    # Secrets passed as flags show up in `ps` and shell history, so their
+    # help text steers users to the environment variable or the prompt.
+    env_options = [
+        ("--openai-key", "OPENAI_API_KEY", "OpenAI API key", True),
+        ("--anthropic-key", "ANTHROPIC_API_KEY", "Anthropic API key (optional)", True),
+        ("--groq-key", "GROQ_API_KEY", "Groq API key (optional)", True),
+        ("--alpaca-key", "ALPACA_API_KEY", "Alpaca API key", True),
+        ("--alpaca-secret", "ALPACA_SECRET_KEY", "Alpaca secret key", True),
+        ("--starting-cash", "STARTING_CASH", "Starting capital in USD (default: 1000)", False),
+        ("--slack-webhook", "SLACK_WEBHOOK", "Slack webhook URL (optional)", True),
+        ("--email-from", "EMAIL_FROM", "Email for notifications (optional)", False),
+        ("--email-to", "EMAIL_TO", "Email to receive reports (optional)", False),
+        ("--email-password", "EMAIL_PASSWORD", "Email app password (optional)", True),
+    ]
+    for flag, env_var, help_text, secret in env_options:
+        if secret:
+            help_text += f"; prefer setting {env_var} - flag values are visible in ps"
+        parser.add_argument(flag, default=os.environ.get(env_var),
+                            help=f"{help_text} [env: {env_var}]")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main deployment function"""
+    args = parse_args(argv)
     print_banner()
     
     # Check Python version
     check_python_version()
     
-    # Create environment file
-    create_env_file()
-    
-    # Install dependencies
-    install_dependencies()
+    # Collect environment settings (interactive, must stay on the main thread)
+    env_content = _prompt_env(args)
     
-    # Create directories
-    create_directories()
+    # Write .env, create directories and install dependencies concurrently;
+    # the local I/O overlaps with the network-bound pip subprocess. pip writes
+    # straight to the terminal, so its output may interleave with the local
+    # steps' status lines - _print_lock only keeps Python-side lines intact.
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [
+            pool.submit(_write_env, env_content),
+            pool.submit(create_directories),
+            pool.submit(install_dependencies, args.force, args.cache_ttl_hours),
+        ]
+        for future in futures:
+            future.result()
     
-    # Run tests
-    run_tests()
+    # Run tests in the background so they don't hold up deployment selection;
+    # their output goes to a log so it can't garble the prompts below
+    test_pool = test_future = None
+    stop_tests = threading.Event()
+    if not args.skip_tests:
+        test_pool = ThreadPoolExecutor(max_workers=1)
+        test_future = test_pool.submit(run_tests, SETUP_TEST_LOG, stop_tests)
     
-    # Show deployment options
-    show_deployment_options()
+    try:
+        # Show deployment options
+        show_deployment_options()
+        
+        # Report test outcome; a failure warns but never blocks deployment
+        # (the child's own 60s timeout bounds this wait)
+        if test_future:
+            print("\n🧪 TEST RESULTS")
+            print("=" * 40)
+            passed, message = test_future.result()
+            print(message)
+            print(f"Test output: {SETUP_TEST_LOG}")
+            if not passed:
+                print("⚠️  Setup tests did not pass - deployment continued anyway")
+    finally:
+        # On Ctrl-C or early exit, kill the test child rather than waiting on it
+        if test_pool:
+            stop_tests.set()
+            test_pool.shutdown(wait=True, cancel_futures=True)
     
     print("\n🎉 DEPLOYMENT COMPLETE!")
     print("=" * 40)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the deploy.py dependency install cache (no network, no pip)
+"""
+import json
+import time
+
+import pytest
+
+import deploy
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run each test in a scratch directory with a requirements file"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "requirements.txt").write_text("requests>=2.31.0\n")
+    return tmp_path
+
+
+@pytest.fixture
+def pip_calls(monkeypatch):
+    """Record pip invocations instead of running them"""
+    calls = []
+    monkeypatch.setattr(deploy.subprocess, "run", lambda cmd, **kwargs: calls.append(cmd))
+    return calls
+
+
+def test_fingerprint_changes_with_requirements(workdir):
+    before = deploy._requirements_fingerprint()
+    (workdir / "requirements.txt").write_text("requests>=2.32.0\n")
+    assert deploy._requirements_fingerprint() != before
+
+
+def test_fingerprint_changes_with_constraints(workdir):
+    before = deploy._requirements_fingerprint()
+    (workdir / "constraints.txt").write_text("urllib3<3\n")
+    with_constraints = deploy._requirements_fingerprint()
+    assert with_constraints != before
+    (workdir / "constraints.txt").write_text("urllib3<2\n")
+    assert deploy._requirements_fingerprint() != with_constraints
+
+
+def test_fingerprint_changes_with_interpreter(workdir, monkeypatch):
+    before = deploy._requirements_fingerprint()
+    monkeypatch.setattr(deploy.sys, "executable", str(workdir / "venv" / "bin" / "python"))
+    monkeypatch.setattr(deploy.sys, "prefix", str(workdir / "venv"))
+    assert deploy._requirements_fingerprint() != before
+
+
+def test_corrupt_cache_is_ignored(workdir):
+    deploy.DEPLOY_CACHE_FILE.parent.mkdir()
+    deploy.DEPLOY_CACHE_FILE.write_text("{not json")
+    assert deploy._load_deploy_cache() == {}
+
+
+def test_install_records_fingerprint(workdir, pip_calls):
+    deploy.install_dependencies()
+    assert len(pip_calls) == 1
+    cache = json.loads(deploy.DEPLOY_CACHE_FILE.read_text())
+    assert cache["fingerprint"] == deploy._requirements_fingerprint()
+
+
+def test_unchanged_requirements_skip_install(workdir, pip_calls):
+    deploy._save_deploy_cache(deploy._requirements_fingerprint())
+    deploy.install_dependencies()
+    assert pip_calls == []
+
+
+def test_expired_cache_reinstalls(workdir, pip_calls, monkeypatch):
+    deploy._save_deploy_cache(deploy._requirements_fingerprint())
+    later = time.time() + 25 * 3600
+    monkeypatch.setattr(deploy.time, "time", lambda: later)
+    deploy.install_dependencies(ttl_hours=24)
+    assert len(pip_calls) == 1
+
+
+def test_force_bypasses_cache(workdir, pip_calls):
+    deploy._save_deploy_cache(deploy._requirements_fingerprint())
+    deploy.install_dependencies(force=True)
+    assert len(pip_calls) == 1
+
+
+def test_missing_requirements_exits_cleanly(workdir, pip_calls):
+    (workdir / "requirements.txt").unlink()
+    with pytest.raises(SystemExit) as exc:
+        deploy.install_dependencies()
+    assert exc.value.code == 1
+    assert pip_calls == []
+
+
+def test_create_directories_reports_in_order(workdir, capsys):
+    (workdir / "logs").mkdir()
+    deploy.create_directories()
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith("✅")]
+    assert lines == ["✅ Created data/", "✅ logs/ already exists", "✅ Created reports/"]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for deploy.py .env value collection and rendering (no prompts, no disk)
+"""
+import io
+
+import pytest
+
+import deploy
+
+ENV_VARS = [
+    "OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GROQ_API_KEY", "ALPACA_API_KEY",
+    "ALPACA_SECRET_KEY", "STARTING_CASH", "SLACK_WEBHOOK", "EMAIL_FROM",
+    "EMAIL_TO", "EMAIL_PASSWORD",
+]
+
+
+class FakeTTY(io.StringIO):
+    """stdin stand-in that claims to be interactive"""
+
+    def isatty(self):
+        return True
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    """Start every test without deploy-related environment variables"""
+    for var in ENV_VARS:
+        monkeypatch.delenv(var, raising=False)
+
+
+@pytest.fixture
+def no_tty(monkeypatch):
+    """Non-interactive stdin; any prompt is a test failure"""
+    def fail(prompt=""):
+        raise AssertionError(f"unexpected prompt: {prompt}")
+    monkeypatch.setattr(deploy.sys, "stdin", io.StringIO())
+    monkeypatch.setattr("builtins.input", fail)
+    monkeypatch.setattr(deploy.getpass, "getpass", fail)
+
+
+def _env_values(content):
+    """Parse KEY=value lines from rendered .env content"""
+    return dict(line.split("=", 1) for line in content.splitlines()
+                if line and not line.startswith("#"))
+
+
+def test_cli_value_beats_env(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-env")
+    assert deploy.parse_args(["--openai-key", "sk-cli"]).openai_key == "sk-cli"
+    assert deploy.parse_args([]).openai_key == "sk-env"
+
+
+def test_blank_value_falls_back_to_default(no_tty):
+    assert deploy._ask("   ", "Starting capital: ", default="1000") == "1000"
+
+
+def test_non_tty_missing_value_uses_default_without_prompting(no_tty):
+    assert deploy._ask(None, "Slack webhook URL: ") == ""
+
+
+def test_tty_prompts_for_missing_secret(monkeypatch):
+    monkeypatch.setattr(deploy.sys, "stdin", FakeTTY())
+    monkeypatch.setattr(deploy.getpass, "getpass", lambda prompt: " sk-typed ")
+    assert deploy._ask("", "OpenAI key: ", secret=True) == "sk-typed"
+
+
+def test_values_are_stripped(no_tty):
+    assert deploy._ask("  sk-abc \n", "OpenAI key: ") == "sk-abc"
+
+
+def test_prompt_env_renders_dollar_values_literally(monkeypatch, no_tty):
+    monkeypatch.setenv("ALPACA_SECRET_KEY", "pa$$word$alpaca_key${openai_key}")
+    monkeypatch.setenv("EMAIL_PASSWORD", "$1000")
+    args = deploy.parse_args(["--openai-key", "sk-test", "--alpaca-key", "AK123"])
+    content = deploy._prompt_env(args)
+    values = _env_values(content)
+    assert values["OPENAI_API_KEY"] == "sk-test"
+    assert values["ALPACA_API_KEY"] == "AK123"
+    assert values["ALPACA_SECRET_KEY"] == "pa$$word$alpaca_key${openai_key}"
+    assert values["EMAIL_PASSWORD"] == "$1000"
+    assert values["STARTING_CASH"] == "1000"
+    assert values["ANTHROPIC_API_KEY"] == ""
+    # Escaped literals in the template comments survive substitution
+    assert "($300M default)" in content
+    assert "($50K default)" in content
+
+
+def test_prompt_env_warns_on_missing_required_keys(no_tty, capsys):
+    deploy._prompt_env(deploy.parse_args([]))
+    out = capsys.readouterr().out
+    assert "OpenAI key should start with 'sk-'" in out
+    assert "Alpaca API key and secret are required" in out
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for deploy.py subprocess streaming helpers (local python children only)
+"""
+import io
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import deploy
+
+
+def _py(code):
+    """Command that runs a snippet in a fresh interpreter"""
+    return [sys.executable, "-c", code]
+
+
+def test_output_reaches_target():
+    out = io.StringIO()
+    returncode = deploy._stream(_py("print('one'); print('two')"), output=out)
+    assert returncode == 0
+    assert out.getvalue().splitlines() == ["one", "two"]
+
+
+def test_stderr_is_merged_into_output():
+    out = io.StringIO()
+    deploy._stream(_py("import sys; sys.stderr.write('oops\\n')"), output=out)
+    assert out.getvalue() == "oops\n"
+
+
+def test_nonzero_exit_returned_without_check():
+    assert deploy._stream(_py("raise SystemExit(3)"), output=io.StringIO()) == 3
+
+
+def test_check_raises_called_process_error():
+    with pytest.raises(subprocess.CalledProcessError) as exc:
+        deploy._stream(_py("raise SystemExit(2)"), check=True, output=io.StringIO())
+    assert exc.value.returncode == 2
+
+
+@pytest.mark.parametrize("attempt", range(5))
+def test_timeout_raises(attempt):
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        deploy._stream(_py("import time; time.sleep(10)"), timeout=0.3, output=io.StringIO())
+    assert time.monotonic() - start < 5
+
+
+def test_fast_command_with_timeout_does_not_raise():
+    assert deploy._stream(_py("pass"), timeout=5, output=io.StringIO()) == 0
+
+
+def test_stop_event_kills_child():
+    stop = threading.Event()
+    threading.Timer(0.3, stop.set).start()
+    start = time.monotonic()
+    returncode = deploy._stream(_py("import time; time.sleep(10)"), output=io.StringIO(),
+                                stop=stop)
+    assert returncode != 0
+    assert time.monotonic() - start < 5
+
+
+def test_kill_escalates_when_sigterm_ignored():
+    proc = subprocess.Popen(
+        _py("import signal, sys, time\n"
+            "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+            "print('ready', flush=True)\n"
+            "time.sleep(30)"),
+        stdout=subprocess.PIPE, text=True, start_new_session=(deploy.os.name == "posix"))
+    assert proc.stdout.readline() == "ready\n"
+    assert deploy._kill(proc, grace=0.2) is True
+    assert proc.wait(timeout=5) != 0
+    proc.stdout.close()
+
+
+def test_kill_on_finished_process_is_noop():
+    proc = subprocess.Popen(_py("pass"))
+    proc.wait()
+    assert deploy._kill(proc) is False
+
+
+def test_run_tests_reports_timeout(monkeypatch):
+    def timeout(cmd, **kwargs):
+        raise subprocess.TimeoutExpired(cmd, kwargs.get("timeout"))
+    monkeypatch.setattr(deploy, "_stream", timeout)
+    assert deploy.run_tests() == (False, "⚠️  AI connection test timed out")
+
+
+def test_run_tests_writes_log(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_ai_only.py").write_text("print('ai ok')\n")
+    log_path = tmp_path / "setup_test.log"
+    passed, message = deploy.run_tests(log_path)
+    assert passed, message
+    assert log_path.read_text() == "ai ok\n"